@@ -3,18 +3,189 @@
 
 from __future__ import annotations
 
-import queue
+import collections
+import enum
+import functools
+import mmap
+import os
 import subprocess
 import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
 
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 
 
+class MsgKind(enum.IntEnum):
+    """Tipos de mensaje que el hilo de conversión envía a la interfaz."""
+
+    PROGRESS = enum.auto()
+    LOG = enum.auto()
+    FINISHED = enum.auto()
+
+
+class Msg(NamedTuple):
+    """Mensaje tipado de la cola trabajador → UI."""
+
+    kind: MsgKind
+    payload: object = None
+
+
+class FileRecord(NamedTuple):
+    """Rutas precalculadas de un archivo de origen.
+
+    Se construyen una sola vez al seleccionar los archivos para que el bucle
+    de conversión no repita operaciones sobre objetos ``Path``.
+    """
+
+    path: str
+    stem: str
+    parent: str
+    name: str
+
+
+# Etiqueta de formato MPEG Layer 3 en el chunk "fmt " de un WAV.
+WAVE_FORMAT_MP3 = 0x0055
+
+
+class WavHeader(NamedTuple):
+    """Datos útiles del encabezado RIFF de un WAV."""
+
+    format_tag: int
+    duration: float
+
+
+@functools.lru_cache(maxsize=None)
+def probe_wav_header(path: str) -> Optional[WavHeader]:
+    """Lee la etiqueta de formato y la duración de un WAV desde su cabecera.
+
+    Recorre los chunks RIFF hasta ``fmt `` y ``data`` y calcula la duración
+    como tamaño de datos entre tasa de bytes: unas pocas lecturas en lugar
+    de un proceso ffprobe por archivo. Devuelve ``None`` si el archivo no es
+    RIFF/WAVE o está truncado; el llamante puede recurrir entonces a ffprobe.
+    """
+    try:
+        with open(path, "rb") as handle:
+            riff = handle.read(12)
+            if len(riff) < 12 or riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+                return None
+            format_tag = 0
+            byte_rate = 0
+            while True:
+                header = handle.read(8)
+                if len(header) < 8:
+                    return None
+                chunk_id = header[:4]
+                size = int.from_bytes(header[4:8], "little")
+                if chunk_id == b"fmt ":
+                    fmt = handle.read(min(size, 16))
+                    if len(fmt) < 16:
+                        return None
+                    format_tag = int.from_bytes(fmt[0:2], "little")
+                    byte_rate = int.from_bytes(fmt[8:12], "little")
+                    handle.seek(size - len(fmt) + (size & 1), 1)
+                elif chunk_id == b"data":
+                    if byte_rate <= 0:
+                        return None
+                    return WavHeader(format_tag, size / byte_rate)
+                else:
+                    handle.seek(size + (size & 1), 1)
+    except OSError:
+        return None
+
+
+def input_is_mp3(path: str) -> bool:
+    """Indica si el audio del archivo ya está codificado como MP3."""
+    header = probe_wav_header(path)
+    if header is not None:
+        return header.format_tag == WAVE_FORMAT_MP3
+    return probe_audio_codec(path) == "mp3"
+
+
+def input_duration(path: str) -> float:
+    """Duración en segundos, desde la cabecera WAV o, en su defecto, ffprobe."""
+    header = probe_wav_header(path)
+    if header is not None and header.duration > 0:
+        return header.duration
+    return probe_duration(path)
+
+
+@functools.lru_cache(maxsize=None)
+def probe_audio_codec(path: str) -> Optional[str]:
+    """Devuelve el códec de audio que ffprobe detecta en el archivo.
+
+    Devuelve ``None`` si ffprobe no está disponible o no reconoce el
+    archivo. El resultado se memoriza por ruta para no sondear dos veces.
+    """
+    try:
+        completed = subprocess.run(
+            [
+                "ffprobe",
+                "-v",
+                "error",
+                "-select_streams",
+                "a:0",
+                "-show_entries",
+                "stream=codec_name",
+                "-of",
+                "csv=p=0",
+                path,
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            check=False,
+        )
+    except FileNotFoundError:
+        return None
+    if completed.returncode != 0:
+        return None
+    return completed.stdout.strip() or None
+
+
+@functools.lru_cache(maxsize=None)
+def probe_duration(path: str) -> float:
+    """Devuelve la duración del archivo en segundos según ffprobe.
+
+    Devuelve ``0.0`` si ffprobe no está disponible o no puede determinarla.
+    El resultado se memoriza por ruta.
+    """
+    try:
+        completed = subprocess.run(
+            [
+                "ffprobe",
+                "-v",
+                "error",
+                "-show_entries",
+                "format=duration",
+                "-of",
+                "csv=p=0",
+                path,
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            check=False,
+        )
+    except FileNotFoundError:
+        return 0.0
+    try:
+        return max(0.0, float(completed.stdout.strip()))
+    except ValueError:
+        return 0.0
+
+
+@functools.lru_cache(maxsize=1)
 def ffmpeg_available() -> bool:
-    """Comprueba si el ejecutable ffmpeg está disponible en el PATH."""
+    """Comprueba si el ejecutable ffmpeg está disponible en el PATH.
+
+    El resultado se memoriza para no lanzar un proceso ``ffmpeg -version``
+    en cada conversión; ``ffmpeg_available.cache_clear()`` fuerza una
+    nueva comprobación.
+    """
     try:
         completed = subprocess.run(
             ["ffmpeg", "-version"],
@@ -30,22 +201,104 @@ def ffmpeg_available() -> bool:
 class ConverterApp:
     """Ventana principal de la aplicación."""
 
+    # Parte constante de la orden ffmpeg; solo varían los hilos, el origen
+    # y el destino por archivo.
+    CMD_PREFIX = ("ffmpeg", "-hide_banner", "-nostats", "-loglevel", "error", "-y")
+
+    # Ajustes de codificación seleccionables: la voz en mono con VBR bajo
+    # reduce el tiempo de CPU de libmp3lame a cerca de la mitad; el CBR da
+    # tasa de bits predecible cuando hace falta.
+    QUALITY_PRESETS = {
+        "Alta": ("-q:a", "2"),
+        "Media": ("-q:a", "5"),
+        "Voz mono": ("-ac", "1", "-q:a", "6"),
+        "CBR 128k": ("-b:a", "128k"),
+    }
+
+    # Hasta este tamaño el WAV se alimenta por tubería desde un mmap, lo que
+    # ahorra a ffmpeg reabrir y sondear el archivo; por encima se pasa la
+    # ruta para no desperdiciar espacio de direcciones.
+    PIPE_FEED_LIMIT = 128 * 1024 * 1024
+
+    # En lotes de muchos archivos pequeños domina el arranque de ffmpeg
+    # (~50-150 ms por proceso): los WAV cortos se agrupan en una sola
+    # invocación con varias entradas -i y una salida -map por archivo, que
+    # conserva los nombres de destino. Por debajo del mínimo no compensa.
+    BATCH_FILE_LIMIT = 8 * 1024 * 1024
+    BATCH_MAX_INPUTS = 16
+    BATCH_MIN_FILES = 4
+
     def __init__(self, root: tk.Tk) -> None:
         self.root = root
         self.root.title("2MP3 - Convertidor WAV a MP3")
         self.root.geometry("640x480")
         self.root.resizable(True, True)
 
-        self.selected_files: List[Path] = []
+        self.selected_records: List[FileRecord] = []
         self.output_dir: Optional[Path] = None
-        self.conversion_thread: Optional[threading.Thread] = None
-        self.queue: "queue.Queue[str]" = queue.Queue()
+        self._max_workers = 1
+        self._force = False
+        self._quality_args = self.QUALITY_PRESETS["Alta"]
+        self._dirs_made: Set[str] = set()
+
+        # Estado del progreso ponderado por duración. Las claves por archivo
+        # de _file_elapsed solo las escribe su propio trabajo; los acumulados
+        # solo los toca el hilo orquestador.
+        self._use_durations = False
+        self._total_duration = 0.0
+        self._duration_done = 0.0
+        self._file_elapsed: Dict[FileRecord, float] = {}
+        self._count_total = 1
+        self._count_done = 0
+        self._last_progress_push = 0.0
+        self._log_buf: "collections.deque[str]" = collections.deque()
+        self._log_flush_pending = False
+
+        # Canal trabajador → UI: append/popleft de deque son atómicos en
+        # CPython, sin el candado que paga queue.Queue por mensaje; el evento
+        # virtual despierta a la UI sin sondeo periódico.
+        self._msgs: "collections.deque[Msg]" = collections.deque()
+        self.root.bind("<<Msg>>", self._drain_msgs)
+
+        # Despacho por tabla: evita la cadena de isinstance/comparaciones de
+        # cadenas por cada mensaje al vaciar la cola.
+        self._pending_progress: Optional[float] = None
+        self._batch_finished = False
+        self._handlers = {
+            MsgKind.PROGRESS: self._note_progress,
+            MsgKind.LOG: self._log_buf.append,
+            MsgKind.FINISHED: self._note_finished,
+        }
+
+        # Grupo de hilos persistente: se reutiliza entre lotes para no pagar
+        # la creación/destrucción de hilos en cada conversión. La plaza extra
+        # queda reservada para el trabajo de orquestación.
+        self._executor = ThreadPoolExecutor(
+            max_workers=(os.cpu_count() or 1) + 1,
+            thread_name_prefix="conv",
+        )
+        self._current_future: Optional["Future[None]"] = None
+
+        # Procesos ffmpeg vivos: al cerrar la ventana hay que terminarlos,
+        # porque los hilos del grupo no son daemon y una conversión en curso
+        # mantendría el proceso de la aplicación abierto.
+        self._procs: Set[subprocess.Popen] = set()
+        self._procs_lock = threading.Lock()
+        self.root.protocol("WM_DELETE_WINDOW", self._on_close)
 
         self._build_widgets()
-        self._poll_queue()
 
     def _build_widgets(self) -> None:
         """Crea todos los widgets de la interfaz."""
+        menubar = tk.Menu(self.root)
+        tools_menu = tk.Menu(menubar, tearoff=0)
+        tools_menu.add_command(
+            label="Volver a buscar ffmpeg",
+            command=self._rescan_ffmpeg,
+        )
+        menubar.add_cascade(label="Herramientas", menu=tools_menu)
+        self.root.configure(menu=menubar)
+
         main_frame = ttk.Frame(self.root, padding=20)
         main_frame.pack(fill=tk.BOTH, expand=True)
 
@@ -92,19 +345,47 @@ class ConverterApp:
         progress_frame = ttk.Frame(main_frame)
         progress_frame.pack(fill=tk.X, expand=False, pady=(12, 0))
 
-        self.progress_var = tk.DoubleVar(value=0.0)
-        self.progress_bar = ttk.Progressbar(
-            progress_frame, variable=self.progress_var, maximum=100
-        )
+        # Sin variables Tk intermedias: actualizar el widget directamente es
+        # una sola llamada Tcl sin observadores de variable en la ruta de
+        # progreso, la más frecuente.
+        self.progress_bar = ttk.Progressbar(progress_frame, maximum=100)
         self.progress_bar.pack(fill=tk.X, expand=True)
 
-        self.status_var = tk.StringVar(value="Listo")
-        ttk.Label(progress_frame, textvariable=self.status_var).pack(anchor=tk.W, pady=(8, 0))
+        self.status_label = ttk.Label(progress_frame, text="Listo")
+        self.status_label.pack(anchor=tk.W, pady=(8, 0))
 
         # Botón de conversión
         action_frame = ttk.Frame(main_frame)
         action_frame.pack(fill=tk.X, expand=False, pady=(12, 0))
 
+        ttk.Label(action_frame, text="Conversiones simultáneas:").pack(side=tk.LEFT)
+        cpu_count = os.cpu_count() or 1
+        self.jobs_var = tk.IntVar(value=cpu_count)
+        ttk.Spinbox(
+            action_frame,
+            from_=1,
+            to=cpu_count,
+            width=4,
+            textvariable=self.jobs_var,
+        ).pack(side=tk.LEFT, padx=(6, 0))
+
+        self.force_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            action_frame,
+            text="Forzar reconversión",
+            variable=self.force_var,
+        ).pack(side=tk.LEFT, padx=(12, 0))
+
+        ttk.Label(action_frame, text="Calidad:").pack(side=tk.LEFT, padx=(12, 0))
+        self.quality_var = tk.StringVar(value="Alta")
+        ttk.Combobox(
+            action_frame,
+            textvariable=self.quality_var,
+            values=list(self.QUALITY_PRESETS),
+            state="readonly",
+            width=10,
+        ).pack(side=tk.LEFT, padx=(6, 0))
+
         self.convert_button = ttk.Button(
             action_frame,
             text="Convertir a MP3",
@@ -120,30 +401,56 @@ class ConverterApp:
         self.log_text.pack(fill=tk.BOTH, expand=True)
 
     # Interacciones de usuario
+    def _rescan_ffmpeg(self) -> None:
+        """Descarta el resultado memorizado y vuelve a buscar ffmpeg."""
+        ffmpeg_available.cache_clear()
+        if ffmpeg_available():
+            self.log("ffmpeg encontrado en el PATH.")
+        else:
+            self.log("ffmpeg sigue sin estar disponible en el PATH.")
+
     def select_files(self) -> None:
         """Abre un diálogo para seleccionar archivos WAV."""
+        wav_filter = "Archivos WAV"
+        filter_var = tk.StringVar()
         filenames = filedialog.askopenfilenames(
             title="Seleccionar archivos WAV",
-            filetypes=[("Archivos WAV", "*.wav"), ("Todos los archivos", "*.*")],
+            filetypes=[(wav_filter, "*.wav"), ("Todos los archivos", "*.*")],
+            typevariable=filter_var,
         )
         if not filenames:
             return
 
-        paths = [Path(name) for name in filenames if Path(name).suffix.lower() == ".wav"]
-        if not paths:
+        # El propio diálogo ya filtró por *.wav salvo que el usuario eligiera
+        # "Todos los archivos"; solo en ese caso se revalida el sufijo. La
+        # comprobación es sobre la cadena: así no se construye ningún Path
+        # para las entradas rechazadas.
+        revalidate = filter_var.get() != wav_filter
+        records: List[FileRecord] = []
+        for name in filenames:
+            if revalidate and not name.lower().endswith(".wav"):
+                continue
+            path = Path(name)
+            records.append(
+                FileRecord(
+                    os.fspath(path), path.stem, os.fspath(path.parent), path.name
+                )
+            )
+        if not records:
             messagebox.showwarning(
                 "Sin archivos válidos",
                 "No se seleccionaron archivos WAV válidos.",
             )
             return
 
-        self.selected_files = paths
+        self.selected_records = records
         self.file_list.delete(0, tk.END)
-        for path in self.selected_files:
-            self.file_list.insert(tk.END, str(path))
+        # insert acepta varargs: una sola llamada Tcl en lugar de un viaje
+        # Python/Tcl (y un redibujado) por archivo.
+        self.file_list.insert(tk.END, *(record.path for record in records))
 
         self.file_count_var.set(
-            f"{len(self.selected_files)} archivo(s) seleccionado(s)"
+            f"{len(self.selected_records)} archivo(s) seleccionado(s)"
         )
         self.log("Se seleccionaron nuevos archivos para convertir.")
 
@@ -156,7 +463,7 @@ class ConverterApp:
         self.log(f"Carpeta de salida establecida en: {self.output_dir}")
 
     def start_conversion(self) -> None:
-        if not self.selected_files:
+        if not self.selected_records:
             messagebox.showinfo(
                 "Sin archivos",
                 "Selecciona al menos un archivo WAV para convertir.",
@@ -170,91 +477,456 @@ class ConverterApp:
             )
             return
 
-        if self.conversion_thread and self.conversion_thread.is_alive():
+        if self._current_future and not self._current_future.done():
             messagebox.showinfo(
                 "Conversión en progreso",
                 "Ya hay una conversión en curso.",
             )
             return
 
+        # El spinbox es editable y get() lanza TclError si el campo quedó
+        # vacío o no numérico; se lee antes de deshabilitar el botón para que
+        # un despiste de entrada no lo deje inutilizado el resto de la sesión.
+        try:
+            jobs = self.jobs_var.get()
+        except tk.TclError:
+            jobs = os.cpu_count() or 1
+
         self.convert_button.config(state=tk.DISABLED)
-        self.progress_var.set(0)
-        self.status_var.set("Iniciando conversión...")
+        self._max_workers = max(1, min(jobs, len(self.selected_records)))
+        self._force = self.force_var.get()
+        self._quality_args = self.QUALITY_PRESETS.get(
+            self.quality_var.get(), self.QUALITY_PRESETS["Alta"]
+        )
+        self._dirs_made.clear()
+        # Los sondeos se memorizan solo por ruta, así que valen dentro de un
+        # lote pero no entre lotes: el archivo puede haber cambiado en disco
+        # (el flujo incremental con SKIP lo fomenta) y una cabecera obsoleta
+        # elegiría mal la vía de copia, la tubería stdin o la duración.
+        probe_wav_header.cache_clear()
+        probe_audio_codec.cache_clear()
+        probe_duration.cache_clear()
+        self.progress_bar["value"] = 0
+        self.status_label.configure(text="Iniciando conversión...")
         self.log("Iniciando conversión de archivos.")
 
-        self.conversion_thread = threading.Thread(
-            target=self._convert_files_worker,
-            daemon=True,
-        )
-        self.conversion_thread.start()
+        self._current_future = self._executor.submit(self._convert_files_worker)
 
     # Hilo de conversión
+    def _post(self, msg: Msg) -> None:
+        """Publica un mensaje para la UI y la despierta con un evento virtual.
+
+        ``event_generate`` con ``when="tail"`` es seguro desde otros hilos y
+        evita el sondeo periódico de la cola.
+        """
+        self._msgs.append(msg)
+        try:
+            self.root.event_generate("<<Msg>>", when="tail")
+        except tk.TclError:
+            # La ventana se cerró con la conversión aún en marcha.
+            pass
+
+    @staticmethod
+    def _destination_up_to_date(source: str, destination: str) -> bool:
+        """Indica si el destino existe y es más reciente que el origen."""
+        try:
+            return os.path.getmtime(destination) >= os.path.getmtime(source)
+        except OSError:
+            return False
+
+    def _push_progress(self, force: bool = False) -> None:
+        """Envía el progreso global a la UI, limitado a ~5 envíos/segundo."""
+        now = time.monotonic()
+        if not force and now - self._last_progress_push < 0.2:
+            return
+        self._last_progress_push = now
+        if self._use_durations:
+            elapsed = self._duration_done + sum(self._file_elapsed.values())
+            pct = (elapsed / self._total_duration) * 100
+        else:
+            pct = (self._count_done / self._count_total) * 100
+        self._post(Msg(MsgKind.PROGRESS, min(pct, 100.0)))
+
+    def _mark_done(self, record: FileRecord, duration: float) -> None:
+        self._file_elapsed.pop(record, None)
+        self._duration_done += duration
+        self._count_done += 1
+        self._push_progress(force=True)
+
     def _convert_files_worker(self) -> None:
-        total = len(self.selected_files)
-        for index, source in enumerate(self.selected_files, start=1):
+        records = self.selected_records
+        total = len(records)
+        out_dir = os.fspath(self.output_dir) if self.output_dir else None
+
+        # Progreso ponderado por duración: así un archivo largo avanza la
+        # barra de forma continua en vez de congelarla hasta terminar. Si
+        # no se conoce alguna duración, se vuelve al progreso por número
+        # de archivos.
+        durations = {record: input_duration(record.path) for record in records}
+        total_duration = sum(durations.values())
+        self._use_durations = total_duration > 0 and all(
+            duration > 0 for duration in durations.values()
+        )
+        self._total_duration = total_duration
+        self._duration_done = 0.0
+        self._file_elapsed = {}
+        self._count_total = total
+        self._count_done = 0
+        self._last_progress_push = 0.0
+
+        # Omite el paso más caro del todo: si el MP3 ya existe y es más
+        # reciente que el WAV, no hay nada que hacer (salvo reconversión
+        # forzada).
+        jobs = []
+        for record in records:
+            destination = os.path.join(out_dir or record.parent, record.stem + ".mp3")
+            if not self._force and self._destination_up_to_date(record.path, destination):
+                self._post(Msg(MsgKind.LOG, f"SKIP: {record.name} (ya convertido)"))
+                self._mark_done(record, durations[record])
+            else:
+                jobs.append((record, destination))
+
+        # Cada invocación de ffmpeg es un proceso externo independiente, así que
+        # los hilos no compiten por el GIL durante la conversión. Se reparten
+        # los hilos internos de ffmpeg entre los trabajos para no sobresuscribir.
+        threads = max(1, (os.cpu_count() or 1) // self._max_workers)
+
+        # Los WAV pequeños (y que no van por la vía de copia MP3) se agrupan
+        # para amortizar el arranque de ffmpeg; el resto se convierte archivo
+        # a archivo, que conserva la tubería mmap, la copia de flujo y el
+        # progreso fino.
+        batchable = []
+        singles = []
+        for job in jobs:
+            record, _destination = job
             try:
-                dest_dir = self.output_dir or source.parent
-                dest = dest_dir / f"{source.stem}.mp3"
-                self._convert_single(source, dest)
-                self.queue.put(f"OK: {source.name} → {dest.name}")
-            except Exception as exc:  # noqa: BLE001
-                self.queue.put(f"ERROR: {source.name} → {exc}")
-            finally:
-                progress = (index / total) * 100
-                self.queue.put(("PROGRESS", progress))
-
-        self.queue.put("FINISHED")
+                size = os.path.getsize(record.path)
+            except OSError:
+                size = 0
+            if 0 < size <= self.BATCH_FILE_LIMIT and not input_is_mp3(record.path):
+                batchable.append(job)
+            else:
+                singles.append(job)
+        if len(batchable) < self.BATCH_MIN_FILES:
+            singles = batchable + singles
+            batchable = []
+
+        groups = [[job] for job in singles]
+        groups += [
+            batchable[start : start + self.BATCH_MAX_INPUTS]
+            for start in range(0, len(batchable), self.BATCH_MAX_INPUTS)
+        ]
 
-    def _convert_single(self, source: Path, destination: Path) -> None:
-        destination.parent.mkdir(parents=True, exist_ok=True)
+        # Los trabajos comparten el grupo de hilos persistente; la ventana
+        # de envío respeta el límite de conversiones simultáneas del usuario.
+        pending = collections.deque(groups)
+        futures = {}
+
+        def submit_next() -> None:
+            if not pending:
+                return
+            group = pending.popleft()
+            if len(group) == 1:
+                record, destination = group[0]
+                future = self._executor.submit(
+                    self._convert_single, record, destination, threads
+                )
+            else:
+                future = self._executor.submit(self._convert_batch, group, threads)
+            futures[future] = group
+
+        for _ in range(self._max_workers):
+            submit_next()
+
+        while futures:
+            completed, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in completed:
+                group = futures.pop(future)
+                error: Optional[BaseException] = None
+                try:
+                    future.result()
+                except Exception as exc:  # noqa: BLE001
+                    error = exc
+                if error is None:
+                    for record, _destination in group:
+                        self._post(Msg(MsgKind.LOG, f"OK: {record.name} → {record.stem}.mp3"))
+                        self._mark_done(record, durations[record])
+                elif len(group) > 1:
+                    # Una entrada corrupta no debe dar por perdido el lote
+                    # entero: se reencola archivo a archivo para aislar el
+                    # error en el origen que realmente falla.
+                    self._post(
+                        Msg(
+                            MsgKind.LOG,
+                            f"AVISO: falló un lote de {len(group)} archivos; "
+                            "se reintenta uno a uno.",
+                        )
+                    )
+                    for job in reversed(group):
+                        pending.appendleft([job])
+                else:
+                    record = group[0][0]
+                    self._post(Msg(MsgKind.LOG, f"ERROR: {record.name} → {error}"))
+                    self._mark_done(record, durations[record])
+                submit_next()
+
+        self._post(Msg(MsgKind.FINISHED))
+
+    def _track_proc(self, process: subprocess.Popen) -> None:
+        with self._procs_lock:
+            self._procs.add(process)
+
+    def _untrack_proc(self, process: subprocess.Popen) -> None:
+        with self._procs_lock:
+            self._procs.discard(process)
+
+    @staticmethod
+    def _consume_stderr(
+        process: subprocess.Popen,
+    ) -> Tuple["collections.deque[str]", threading.Thread]:
+        """Consume stderr del proceso en un hilo aparte.
+
+        Con varias tuberías activas, leer stderr en paralelo impide que
+        ffmpeg se bloquee si la llena mientras el hilo llamante alimenta
+        stdin o lee el progreso por stdout. Devuelve la cola con las últimas
+        líneas (para el mensaje de error) y el hilo lector, al que hay que
+        hacer ``join`` antes de consultar la cola.
+        """
+        tail: "collections.deque[str]" = collections.deque(maxlen=64)
+
+        def drain() -> None:
+            for line in process.stderr:
+                tail.append(line.decode(errors="replace").rstrip("\n"))
+
+        reader = threading.Thread(target=drain, daemon=True)
+        reader.start()
+        return tail, reader
+
+    def _convert_single(self, record: FileRecord, destination: str, threads: int = 0) -> None:
+        # makedirs implica un stat por llamada; se memorizan las carpetas ya
+        # creadas para omitirlo en el resto del lote.
+        dest_dir = os.path.dirname(destination)
+        if dest_dir not in self._dirs_made:
+            os.makedirs(dest_dir, exist_ok=True)
+            self._dirs_made.add(dest_dir)
 
+        try:
+            size = os.path.getsize(record.path)
+        except OSError:
+            size = 0
+        # La tubería fuerza el demuxer con -f wav, así que solo se usa con
+        # archivos que de verdad son RIFF/WAVE; un .wav mal llamado (p. ej.
+        # un MP3 renombrado) va por ruta para que ffmpeg autodetecte el
+        # formato, como hacía la versión original.
+        feed_stdin = (
+            0 < size <= self.PIPE_FEED_LIMIT
+            and probe_wav_header(record.path) is not None
+        )
+        input_args = ("-f", "wav", "-i", "pipe:0") if feed_stdin else ("-i", record.path)
+
+        # Si el origen ya contiene audio MP3 (p. ej. MP3 envuelto en WAV),
+        # copiar el flujo evita pasar por el codificador: de recodificar a
+        # poco más que una copia de bytes.
+        if input_is_mp3(record.path):
+            codec_args = ("-codec:a", "copy")
+        else:
+            codec_args = ("-codec:a", "libmp3lame", *self._quality_args)
+
+        # El progreso fino de ffmpeg sale por stdout; se omite cuando el
+        # origen va por stdin (archivos cortos, donde no aporta nada) para no
+        # mantener tres tuberías activas a la vez.
+        report_progress = self._use_durations and not feed_stdin
+
+        # Se codifica sobre un nombre temporal y se renombra al final: así un
+        # ffmpeg fallido o interrumpido nunca deja un .mp3 parcial que la
+        # comprobación de mtime daría por bueno en ejecuciones posteriores.
+        # El muxer se fija con -f porque ya no se deduce de la extensión.
+        partial = destination + ".part"
         command = [
-            "ffmpeg",
-            "-y",
-            "-i",
-            str(source),
-            "-codec:a",
-            "libmp3lame",
-            "-q:a",
-            "2",
-            str(destination),
+            *self.CMD_PREFIX,
+            "-threads",
+            str(threads),
+            *input_args,
+            *codec_args,
         ]
-        process = subprocess.run(
+        if report_progress:
+            command += ["-progress", "pipe:1"]
+        command += ["-f", "mp3", partial]
+
+        process = subprocess.Popen(
             command,
-            stdout=subprocess.PIPE,
+            stdin=subprocess.PIPE if feed_stdin else subprocess.DEVNULL,
+            stdout=subprocess.PIPE if report_progress else subprocess.DEVNULL,
             stderr=subprocess.PIPE,
-            text=True,
-            check=False,
+            bufsize=1 << 20,
         )
-        if process.returncode != 0:
-            raise RuntimeError(process.stderr.strip() or "Error desconocido de ffmpeg")
-
-    # Actualización de UI desde el hilo principal
-    def _poll_queue(self) -> None:
+        self._track_proc(process)
         try:
-            while True:
-                item = self.queue.get_nowait()
-                if isinstance(item, tuple) and item[0] == "PROGRESS":
-                    self.progress_var.set(item[1])
-                    self.status_var.set(f"Progreso: {item[1]:.0f}%")
-                elif item == "FINISHED":
-                    self._on_conversion_finished()
-                else:
-                    self.log(str(item))
-        except queue.Empty:
+            # El lector arranca antes de tocar stdin/stdout: si ffmpeg llenara
+            # stderr mientras este hilo escribe la entrada o lee el progreso,
+            # ambos lados quedarían bloqueados para siempre.
+            tail, stderr_reader = self._consume_stderr(process)
+            if feed_stdin:
+                try:
+                    with open(record.path, "rb") as handle, mmap.mmap(
+                        handle.fileno(), 0, access=mmap.ACCESS_READ
+                    ) as mapped:
+                        process.stdin.write(mapped)
+                except BrokenPipeError:
+                    # ffmpeg terminó antes de consumir todo; el error real sale
+                    # por stderr.
+                    pass
+                finally:
+                    try:
+                        process.stdin.close()
+                    except BrokenPipeError:
+                        pass
+            if report_progress:
+                # ffmpeg emite bloques clave=valor cada ~0,5 s; out_time_us (y
+                # su alias mal llamado out_time_ms) viene en microsegundos.
+                for raw in process.stdout:
+                    line = raw.decode("ascii", errors="replace").strip()
+                    if line.startswith("out_time_us=") or line.startswith("out_time_ms="):
+                        try:
+                            elapsed_us = int(line.split("=", 1)[1])
+                        except ValueError:
+                            continue
+                        self._file_elapsed[record] = elapsed_us / 1_000_000
+                        self._push_progress()
+            stderr_reader.join()
+        finally:
+            self._untrack_proc(process)
+        if process.wait() != 0:
+            self._discard_partial(partial)
+            raise RuntimeError("\n".join(tail).strip() or "Error desconocido de ffmpeg")
+        os.replace(partial, destination)
+
+    @staticmethod
+    def _discard_partial(partial: str) -> None:
+        """Elimina un destino temporal a medio escribir, si quedó alguno."""
+        try:
+            os.unlink(partial)
+        except OSError:
             pass
+
+    def _convert_batch(self, group: List[Tuple[FileRecord, str]], threads: int = 0) -> None:
+        """Convierte varios archivos pequeños en una sola invocación de ffmpeg.
+
+        Cada origen entra como un ``-i`` propio y sale por su ``-map``
+        correspondiente, así los nombres de destino se conservan igual que en
+        el modo archivo a archivo.
+        """
+        # Igual que en el modo por archivo: salidas sobre nombres temporales
+        # que solo se renombran si toda la invocación termina bien.
+        command = [*self.CMD_PREFIX, "-threads", str(threads)]
+        for record, _destination in group:
+            command += ["-i", record.path]
+        partials = []
+        for index, (record, destination) in enumerate(group):
+            dest_dir = os.path.dirname(destination)
+            if dest_dir not in self._dirs_made:
+                os.makedirs(dest_dir, exist_ok=True)
+                self._dirs_made.add(dest_dir)
+            partial = destination + ".part"
+            partials.append(partial)
+            command += [
+                "-map",
+                f"{index}:a",
+                "-codec:a",
+                "libmp3lame",
+                *self._quality_args,
+                "-f",
+                "mp3",
+                partial,
+            ]
+
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            bufsize=1 << 20,
+        )
+        self._track_proc(process)
+        try:
+            tail, stderr_reader = self._consume_stderr(process)
+            stderr_reader.join()
         finally:
-            self.root.after(100, self._poll_queue)
+            self._untrack_proc(process)
+        if process.wait() != 0:
+            for partial in partials:
+                self._discard_partial(partial)
+            raise RuntimeError("\n".join(tail).strip() or "Error desconocido de ffmpeg")
+        for partial, (_record, destination) in zip(partials, group):
+            os.replace(partial, destination)
+
+    # Actualización de UI desde el hilo principal
+    def _note_progress(self, payload: float) -> None:
+        self._pending_progress = payload
+
+    def _note_finished(self, _payload: object = None) -> None:
+        self._batch_finished = True
+
+    def _drain_msgs(self, _event: object = None) -> None:
+        # Se vacía toda la cola de una vez y se aplica una sola mutación de
+        # UI por tanda; actualizar los widgets por cada mensaje saturaría el
+        # bucle de eventos cuando las conversiones terminan en ráfaga. Los
+        # eventos <<Msg>> posteriores de la misma tanda encuentran la cola
+        # vacía y salen enseguida.
+        self._pending_progress = None
+        self._batch_finished = False
+        handlers = self._handlers
+        msgs = self._msgs
+        while msgs:
+            try:
+                msg = msgs.popleft()
+            except IndexError:
+                break
+            handlers[msg.kind](msg.payload)
+
+        if self._log_buf:
+            self._flush_log()
+        if self._pending_progress is not None:
+            self.progress_bar["value"] = self._pending_progress
+            self.status_label.configure(text=f"Progreso: {self._pending_progress:.0f}%")
+        if self._batch_finished:
+            self._on_conversion_finished()
 
     def _on_conversion_finished(self) -> None:
         self.convert_button.config(state=tk.NORMAL)
-        self.status_var.set("Conversión finalizada")
-        self.progress_var.set(100)
+        self.status_label.configure(text="Conversión finalizada")
+        self.progress_bar["value"] = 100
         self.log("Proceso completado.")
 
+    def _on_close(self) -> None:
+        """Cierra la ventana, terminando las conversiones en curso."""
+        with self._procs_lock:
+            procs = list(self._procs)
+        for process in procs:
+            try:
+                process.terminate()
+            except OSError:
+                pass
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
+
     def log(self, message: str) -> None:
+        """Encola un mensaje para el registro; se escribe en el siguiente idle."""
+        self._log_buf.append(message)
+        if not self._log_flush_pending:
+            self._log_flush_pending = True
+            self.root.after_idle(self._flush_log)
+
+    def _flush_log(self) -> None:
+        # Un solo insert y un solo par de cambios de estado por lote de
+        # mensajes, en lugar de pagarlos por línea.
+        self._log_flush_pending = False
+        if not self._log_buf:
+            return
+        text = "".join(message + "\n" for message in self._log_buf)
+        self._log_buf.clear()
         self.log_text.configure(state=tk.NORMAL)
-        self.log_text.insert(tk.END, message + "\n")
+        self.log_text.insert(tk.END, text)
         self.log_text.see(tk.END)
         self.log_text.configure(state=tk.DISABLED)
 